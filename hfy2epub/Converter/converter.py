@@ -1,22 +1,23 @@
 import subprocess as sp
 import os
-import yaml
-from glob import glob
-import re
+import shutil
+from hfy2epub import _yaml
+from hfy2epub import _fs
 import tempfile
 from datetime import datetime
 
 class Converter:
-    def __init__(self, wiki_dir: str, processed_dir: str) -> None:
+    def __init__(self, wiki_dir: str, processed_dir: str, keep_temp_file: bool = False) -> None:
         """
         Initialize the Converter with directories and title.
 
         :param wiki_dir: Directory containing wiki files.
         :param processed_dir: Directory for processed files.
-        :param title: Title for the EPUB file.
+        :param keep_temp_file: Dump the Pandoc input to a temporary file and keep it for debugging instead of streaming it.
         """
         self.wiki_dir = wiki_dir
         self.processed_dir = processed_dir
+        self.keep_temp_file = keep_temp_file
         self.output_dir = os.path.join(os.getcwd(), 'output')
         os.makedirs(self.output_dir, exist_ok=True)
 
@@ -30,16 +31,14 @@ class Converter:
         first_date, last_date = self.get_dates()
         cover_image = os.path.join(self.wiki_dir, 'cover.jpg').replace('\\', '/')
 
-        wiki_files = glob(os.path.join(self.wiki_dir, '*.yaml'))
-        if not wiki_files:
+        latest_wiki_file = _fs.latest_file(self.wiki_dir)
+        if not latest_wiki_file:
             raise ValueError("No wiki files found in the wiki directory.")
-        
-        latest_wiki_file = max(wiki_files, key=os.path.getmtime)
 
-        with open(latest_wiki_file, 'r', encoding='utf-8') as f:
-            wiki_data: dict = yaml.safe_load(f)
+        wiki_data: dict = _yaml.load_file(latest_wiki_file)
         if not wiki_data:
-            raise ValueError("Wiki data not found. Ensure 'wiki.yaml' exists in the wiki directory.")
+            raise ValueError("Wiki data not found. Ensure 'wiki.json' exists in the wiki directory.")
+        self.wiki_data = wiki_data
         
         author = wiki_data.get('author', 'Unknown Author')
         title = wiki_data.get('wiki_section', 'Unknown Title')
@@ -65,20 +64,81 @@ class Converter:
         """
         Get the first and last chapter dates from the processed file names."""
 
-        processed_files = glob(os.path.join(self.processed_dir, '*.md'))
+        processed_files = _fs.file_names(self.processed_dir, '.md')
         if not processed_files:
             raise ValueError("No processed files found in the directory.")
         
-        pattern = re.compile(r'(\d+).+\.md$')
-        unix_dates = [match.group(1) for f in processed_files if (match := pattern.search(os.path.basename(f)))]
-        if not unix_dates:
+        # File names start with the chapter's unix timestamp: '<timestamp> - <id> - [<title>].md'
+        first_date = last_date = None
+        for file in processed_files:
+            timestamp = file.split(' ', 1)[0]
+            if not timestamp.isdigit():
+                continue
+            timestamp = int(timestamp)
+            if first_date is None or timestamp < first_date:
+                first_date = timestamp
+            if last_date is None or timestamp > last_date:
+                last_date = timestamp
+        if first_date is None:
             raise ValueError("No valid dates found in processed file names.")
-        first_date = min(unix_dates)
-        last_date = max(unix_dates)
-        first_date = datetime.fromtimestamp(int(first_date)).strftime('%Y-%m-%d')
-        last_date = datetime.fromtimestamp(int(last_date)).strftime('%Y-%m-%d')
 
-        return first_date, last_date
+        return datetime.fromtimestamp(first_date).strftime('%Y-%m-%d'), datetime.fromtimestamp(last_date).strftime('%Y-%m-%d')
+
+    def get_output_file(self) -> str:
+        """
+        Get the path of the EPUB file for the current metadata.
+        """
+        title = self.metadata['title']
+        author = self.metadata['creator'][0]['text']
+        return os.path.join(self.output_dir, f'{title} - {author}.epub')
+
+    def is_up_to_date(self) -> bool:
+        """
+        Check if the EPUB file is newer than every processed chapter and the cover image.
+        Title and author are part of the file name, so wiki changes to them always produce a new file.
+        """
+        output_file = self.get_output_file()
+        if not os.path.exists(output_file):
+            return False
+
+        input_mtimes = list(_fs.file_mtimes(self.processed_dir, '.md').values())
+        if 'cover-image' in self.metadata:
+            input_mtimes.append(os.stat(self.metadata['cover-image']).st_mtime_ns)
+        return os.stat(output_file).st_mtime_ns >= max(input_mtimes)
+
+    def get_chapter_files(self) -> list[str]:
+        """
+        Get the processed chapter file names in the order of the wiki chapter list.
+        File names start with the time of the chapter's last OP reply, not its publication, so they are only used
+        to order the chapters the wiki or the processed metadata do not know about, which are placed last.
+        """
+        processed_files = _fs.file_names(self.processed_dir, '.md')
+        metadata_file = os.path.join(self.processed_dir, 'metadata.yaml')
+        if not os.path.exists(metadata_file):
+            return sorted(processed_files)
+
+        wiki_order = {url: i for i, (url, _) in enumerate(self.wiki_data.get('chapters', []))}
+        file_order = {chapter['filename']: wiki_order[chapter['url']]
+                      for chapter in _yaml.load_file(metadata_file).get('chapters', [])
+                      if chapter['url'] in wiki_order}
+        return sorted(processed_files, key=lambda file: (file_order.get(file, len(wiki_order)), file))
+
+    def write_document(self, stream) -> None:
+        """
+        Write metadata and all chapters as a single markdown document.
+
+        :param stream: Binary stream to write the document to.
+        """
+        processed_files = self.get_chapter_files()
+        stream.write(b'---\n')
+        stream.write(_yaml.dump(self.metadata, default_flow_style=False).encode('utf-8'))
+        stream.write(b'---\n\n')
+
+        # Chapters are already UTF-8 encoded, so they are copied as bytes
+        for file in processed_files:
+            with open(os.path.join(self.processed_dir, file), 'rb') as f:
+                shutil.copyfileobj(f, stream, length=1 << 20)
+            stream.write(b'\n\n')
 
     def dump_temp_file(self) -> str:
         """
@@ -86,49 +146,63 @@ class Converter:
 
         :return: Path to the temporary file.
         """
-        processed_files = glob(os.path.join(self.processed_dir, '*.md'))
         with tempfile.NamedTemporaryFile(delete=False, suffix='.md') as temp_file:
-            temp_file.write('---\n'.encode('utf-8'))
-            temp_file.write(yaml.dump(self.metadata, allow_unicode=True, default_flow_style=False).encode('utf-8'))
-            temp_file.write('---\n\n'.encode('utf-8'))
-
-            for file in processed_files:
-                with open(file, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    temp_file.write(content.encode('utf-8'))
-                    temp_file.write('\n\n'.encode('utf-8'))
+            self.write_document(temp_file)
             self.temp_file_path = temp_file.name
         return self.temp_file_path
     
     def execute_pandoc(self) -> None:
         """
-        Execute Pandoc to convert the temporary file to EPUB format.
+        Execute Pandoc to convert the chapters to EPUB format.
+        The document is streamed to Pandoc's stdin, unless a temporary file was dumped with dump_temp_file().
+        Pandoc writes to a partial file that only replaces the EPUB after a successful conversion,
+        so is_up_to_date() never accepts the output of a failed run.
         """
-        if not hasattr(self, 'temp_file_path'):
-            raise ValueError("Temporary file path not set. Call dump_temp_file() first.")
-        
-        output_file = os.path.join(self.output_dir, f'{self.metadata['title']} - {self.metadata['creator'][0]['text']}.epub')
-        command = [
-            'pandoc',
-            self.temp_file_path,
-            '-o', output_file
-        ]
+        output_file = self.get_output_file()
+        root, extension = os.path.splitext(output_file)
+        partial_file = f'{root}.partial{extension}' # Keeps the extension Pandoc picks the output format from
+
+        use_temp_file = hasattr(self, 'temp_file_path')
+        if use_temp_file:
+            command = ['pandoc', self.temp_file_path, '-o', partial_file]
+        else:
+            command = ['pandoc', '-f', 'markdown', '-o', partial_file]
         
         try:
-            sp.run(command, check=True, stdout=sp.PIPE, stderr=sp.PIPE, text=True)
+            with sp.Popen(command, stdin=sp.PIPE, stdout=sp.PIPE, stderr=sp.PIPE) as process:
+                if not use_temp_file:
+                    try:
+                        self.write_document(process.stdin)
+                    except BrokenPipeError:
+                        pass # Pandoc exited early, the error is reported below
+                    except BaseException:
+                        # Pandoc must not convert the truncated document
+                        process.kill()
+                        process.wait()
+                        raise
+                stdout, stderr = process.communicate()
+            if process.returncode != 0:
+                raise sp.CalledProcessError(process.returncode, command, stdout.decode('utf-8', 'replace'), stderr.decode('utf-8', 'replace'))
+            os.replace(partial_file, output_file)
             print(f"[Converter] EPUB file created successfully at {output_file}")
         except sp.CalledProcessError as e:
             print(f"[Converter] Error during conversion: {e}")
             print(f"[Converter] stdout: {e.stdout}")
             print(f"[Converter] stderr: {e.stderr}")
         finally:
-            os.remove(self.temp_file_path)
+            if os.path.exists(partial_file):
+                os.remove(partial_file)
 
     def run(self) -> None:
         """
         Run the conversion process.
         """
         self.make_metadata()
-        temp_file_path = self.dump_temp_file()
-        print(f"[Converter] Temporary file created at {temp_file_path}")
+        if self.is_up_to_date():
+            print(f"[Converter] EPUB file is up to date: {self.get_output_file()}")
+            return
+
+        if self.keep_temp_file:
+            temp_file_path = self.dump_temp_file()
+            print(f"[Converter] Temporary file created at {temp_file_path}")
         self.execute_pandoc()
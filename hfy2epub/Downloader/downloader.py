@@ -1,20 +1,42 @@
 import praw
 import os
+import threading
+from collections.abc import Callable
 from glob import glob
-import yaml
+from hfy2epub import _yaml
+from hfy2epub import _fs
 from hfy2epub.Downloader.validator import validate_metadata
 from hfy2epub.Downloader.validator import compare_meta_and_wiki
-from queue import Queue
-import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 
 from praw.models.comment_forest import CommentForest
 from praw.models import Comment
 
+# Number of chapters downloaded concurrently, every worker authenticates its own Reddit client
+MAX_WORKERS = 4
+
 class Downloader:
-    def __init__(self, reddit: praw.Reddit, raw_dir: str, wiki_dir: str) -> None:
-        self.reddit = reddit
+    def __init__(self, reddit_factory: Callable[[], praw.Reddit], raw_dir: str, wiki_dir: str) -> None:
+        """
+        :param reddit_factory: Creates a new Reddit client, called once per download thread.
+        :param raw_dir: Directory the raw chapters and their metadata are saved to.
+        :param wiki_dir: Directory containing the wiki files.
+        """
+        self.reddit_factory = reddit_factory
         self.raw_dir = raw_dir
         self.wiki_dir = wiki_dir
+        self._local = threading.local()
+
+    @property
+    def reddit(self) -> praw.Reddit:
+        """
+        Reddit client of the current thread.
+        PRAW clients are not thread-safe, so threads never share one.
+        """
+        reddit = getattr(self._local, 'reddit', None)
+        if reddit is None:
+            reddit = self._local.reddit = self.reddit_factory()
+        return reddit
 
     def run(self) -> None:
         """
@@ -30,8 +52,7 @@ class Downloader:
             metadata = self.fetch_update()
 
         if metadata:
-            with open(os.path.join(self.raw_dir, 'metadata.yaml'), 'w', encoding='utf-8') as file:
-                yaml.safe_dump(metadata, file, allow_unicode=True)
+            _yaml.dump_file(metadata, os.path.join(self.raw_dir, 'metadata.yaml'))
             print(f"[Downloader] Metadata saved to {os.path.join(self.raw_dir, 'metadata.yaml')}")
 
     def fetch_update(self) -> dict | None:
@@ -39,15 +60,12 @@ class Downloader:
         Fetch the latest update from the subreddit wiki if any.
         """
         metadata_file = os.path.join(self.raw_dir, 'metadata.yaml')
-        wiki_files = glob(os.path.join(self.wiki_dir, '*.yaml'))
+        wiki_file = _fs.latest_file(self.wiki_dir)
         
-        if not wiki_files:
+        if not wiki_file:
             print("No wiki files found in the wiki directory.")
             return None
         
-        wiki_files.sort(key=os.path.getmtime, reverse=True)
-        wiki_file = wiki_files[0]
-        
         is_valid, missing_chapters = compare_meta_and_wiki(metadata_file, wiki_file)
         if not is_valid:
             print("[Downloader] Metadata does not match the wiki data. Fetching all chapters again.")
@@ -59,28 +77,33 @@ class Downloader:
         
         print(f"[Downloader] Missing chapters found: {missing_chapters.qsize()}. Fetching missing chapters.")
         
-        with open(metadata_file, 'r', encoding='utf-8') as file:
-            metadata = yaml.safe_load(file)
-        with open(wiki_file, 'r', encoding='utf-8') as file:
-            wiki_data = yaml.safe_load(file)
+        metadata = _yaml.load_file(metadata_file, mutable=True)
+        wiki_data = _yaml.load_file(wiki_file)
 
-        df_chapters = pd.DataFrame(metadata['chapters'])
-        df_chapters.sort_values(by='revision_date', ascending=False, inplace=True)
-        for chapter in df_chapters['url'][:2]:
-            missing_chapters.put(chapter)
+        # Re-download the latest chapters as well to pick up recent edits and OP replies
+        latest_chapters = sorted(metadata['chapters'], key=lambda chapter: chapter['revision_date'], reverse=True)
+        for chapter in latest_chapters[:2]:
+            missing_chapters.put(chapter['url'])
 
         print(f'[Downloader] Starting download of {missing_chapters.qsize()} missing chapters from subreddit "{wiki_data["subreddit"]}".')
 
+        chapter_urls: list[str] = []
         while not missing_chapters.empty():
-            chapter_url = missing_chapters.get()
-            chapter_metadata = self.fetch_chapter(chapter_url)
-            if chapter_metadata:
-                metadata['chapters'].append(chapter_metadata)
-                print(f"Downloaded chapter: {chapter_metadata['title']} ({chapter_metadata['url']})")
+            chapter_urls.append(missing_chapters.get())
             missing_chapters.task_done()
-        
-        cleared_metadata = self.delete_old_chapters(metadata['chapters']).to_dict(orient='records')
-        metadata['chapters'] = cleared_metadata
+
+        # Re-downloaded chapters replace their previous version
+        chapters = {chapter['url']: chapter for chapter in metadata['chapters']}
+        for chapter_metadata in self.fetch_chapters(chapter_urls):
+            previous = chapters.get(chapter_metadata['url'])
+            # An unchanged chapter is downloaded to the same file, which must not be deleted
+            if previous and previous['filename'] != chapter_metadata['filename']:
+                file_path = os.path.join(self.raw_dir, previous['filename'])
+                if os.path.exists(file_path):
+                    os.remove(file_path)
+                    print(f"[Downloader] Deleted old version of a chapter: {previous['title']} ({previous['url']})")
+            chapters[chapter_metadata['url']] = chapter_metadata
+        metadata['chapters'] = list(chapters.values())
 
         return metadata
 
@@ -92,22 +115,18 @@ class Downloader:
         for file in glob(os.path.join(self.raw_dir, '*.*')):
             os.remove(file)
 
-        wiki_files = glob(os.path.join(self.wiki_dir, '*.yaml'))
-        if not wiki_files:
+        wiki_file = _fs.latest_file(self.wiki_dir)
+        if not wiki_file:
             print("No wiki files found in the wiki directory.")
             return {}
         
-        wiki_files.sort(key=os.path.getmtime, reverse=True)
-        wiki_file = wiki_files[0]
-        with open(wiki_file, 'r', encoding='utf-8') as file:
-            wiki_data = yaml.safe_load(file)
+        wiki_data = _yaml.load_file(wiki_file)
         
         if not wiki_data or 'chapters' not in wiki_data:
             print("No chapters found in the wiki data.")
             return {}
         
-        download_queue = Queue()
-        for chapter in wiki_data['chapters']: download_queue.put(chapter['url'])
+        chapter_urls = [url for url, _ in wiki_data['chapters']]
 
         metadata = {
             'subreddit': wiki_data['subreddit'],
@@ -117,16 +136,26 @@ class Downloader:
             'chapters': []
         }
 
-        print(f"[Downloader] Starting download of {download_queue.qsize()} chapters from subreddit '{wiki_data['subreddit']}'.")
-        while not download_queue.empty():
-            chapter_url = download_queue.get()
-            chapter_metadata = self.fetch_chapter(chapter_url)
-            if chapter_metadata:
-                metadata['chapters'].append(chapter_metadata)
-                print(f"Downloaded chapter: {chapter_metadata['title']} ({chapter_metadata['url']})")
+        print(f"[Downloader] Starting download of {len(chapter_urls)} chapters from subreddit '{wiki_data['subreddit']}'.")
+        metadata['chapters'] = self.fetch_chapters(chapter_urls)
         
         return metadata
 
+    def fetch_chapters(self, chapter_urls: list[str]) -> list[dict]:
+        """
+        Download several chapters concurrently. Downloads are dominated by network latency, so they are spread over a small thread pool.
+        Every thread uses its own Reddit client and rate limiter, which follow the remaining request budget reported by Reddit.
+            :param chapter_urls: The URLs of the chapters to download.
+            :return: Metadata of the downloaded chapters in the order of the given URLs.
+        """
+        chapters: list[dict] = []
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            for chapter_metadata in executor.map(self.fetch_chapter, chapter_urls):
+                if chapter_metadata:
+                    chapters.append(chapter_metadata)
+                    print(f"Downloaded chapter: {chapter_metadata['title']} ({chapter_metadata['url']})")
+        return chapters
+
     def fetch_chapter(self, chapter_url: str) -> dict | None:
         """
         Download a chapter from the subreddit wiki.
@@ -138,6 +167,8 @@ class Downloader:
             content_md: list[str] = [submission.selftext]
 
             comment_forest: CommentForest = submission.comments
+            # Drop unexpanded "load more comments" stubs, so walking the tree never sends requests
+            comment_forest.replace_more(limit=0)
             op_replies = self.fetch_op_chain(comment_forest, submission.author.name)
             
             if op_replies:
@@ -153,8 +184,8 @@ class Downloader:
 
             file_name = f'{revision_date} - {submission.id} - [{title}].md'
             file_path = os.path.join(self.raw_dir, file_name)
-            with open(file_path, 'w', encoding='utf-8') as file:
-                file.write('\n\n-----\n\n'.join(content_md))
+            with open(file_path, 'wb', buffering=1 << 20) as file:
+                file.write('\n\n-----\n\n'.join(content_md).encode('utf-8'))
 
             metadata = {
                 'url': chapter_url,
@@ -170,42 +201,21 @@ class Downloader:
             return
     
     def fetch_op_chain(self, root: CommentForest, op_username: str) -> list[Comment] | None:
-        
-        def search(current_nodes: CommentForest, path: list[Comment]) -> list | None:
-            for comment in current_nodes:
-                # Check if the current node has the target attribute
-                if comment.author and comment.author.name == op_username:
-                    current_path = path + [comment]
-                    # Recursively search the children of the current node
-                    result = search(comment.replies, current_path)
-                    if result:
-                        return result
-                    else:
-                        # If no further chain is found, return the current path if it's not empty
-                        return current_path if len(current_path) > 0 else None
-                else:
-                    # If the node does not have the target attribute, skip its subtree
-                    continue
-            return None
-        return search(root, [])
-
-    def delete_old_chapters(self, chapters: list[dict]) -> pd.DataFrame:
         """
-        Delete old versions of chapters based on their URLs and revision dates.
-        This method will keep the latest version of each chapter based on the URL and revision date.
-            
-        :param chapters: List of chapter metadata dictionaries.
+        Follow the chain of OP replies, taking the first OP comment on every level of the comment tree.
+            :param root: The comment forest of the submission. MoreComments must already be replaced.
+            :param op_username: The name of the submission author.
+            :return: The OP comments in reply order, or None if OP didn't comment.
         """
-        chapters_df = pd.DataFrame(chapters)
-        df_sorted = chapters_df.sort_values(by=['url','revision_date'], ascending=False)
-        df_filtered = df_sorted.drop_duplicates(subset=['url'], keep='first')
-        
-        mask = df_sorted['url'].isin(df_filtered['url'])
-        df_to_delete = df_sorted[~mask]
-        for _, row in df_to_delete.iterrows():
-            file_path = os.path.join(self.raw_dir, row['filename'])
-            if os.path.exists(file_path):
-                os.remove(file_path)
-                print(f"[Downloader] Deleted old version of a chapter: {row['title']} ({row['url']})")
-        
-        return df_filtered
+        path: list[Comment] = []
+        current_nodes = root
+        while True:
+            for comment in current_nodes:
+                author = comment.author
+                if author and author.name == op_username:
+                    path.append(comment)
+                    current_nodes = comment.replies
+                    break
+            else:
+                # No OP comment on this level, the chain ends here
+                return path or None
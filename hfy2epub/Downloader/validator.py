@@ -1,6 +1,6 @@
 import os
-import yaml
-from glob import glob
+from hfy2epub import _yaml
+from hfy2epub import _fs
 from queue import Queue
 
 def validate_metadata(raw_dir: str) -> bool:
@@ -10,33 +10,35 @@ def validate_metadata(raw_dir: str) -> bool:
         :return: True if all metadata files match the downloaded markdown files, False otherwise.
     """
 
-    metadata_files = glob(os.path.join(raw_dir, '*.yaml'))
-    markdown_files = glob(os.path.join(raw_dir, '*.md'))
+    metadata_file = os.path.join(raw_dir, 'metadata.yaml')
+    markdown_mtimes: dict[str, int] = _fs.file_mtimes(raw_dir, '.md')
 
-    if not metadata_files:
+    if not os.path.exists(metadata_file):
         print("No metadata files found.")
         return False
 
-    if not markdown_files:
+    if not markdown_mtimes:
         print("No markdown files found.")
         return False
 
-    markdown_set: set[str] = set(os.path.basename(f) for f in markdown_files)
-
-    with open(os.path.join(raw_dir, 'metadata.yaml'), 'r', encoding='utf-8') as file:
-        metadata = yaml.safe_load(file)
-        metadata_set = set()
-
-        for chapter in metadata['chapters']:
-            metadata_set.add(chapter['filename'])
+    # The metadata file is written after the chapters, so a newer chapter means the last download was interrupted
+    if max(markdown_mtimes.values()) > os.stat(metadata_file).st_mtime_ns:
+        print("Markdown files are newer than the metadata file.")
+        return False
 
-    missing_markdown: set[str] = metadata_set - markdown_set
+    metadata = _yaml.load_file(metadata_file)
+    metadata_names: list[str] = [chapter['filename'] for chapter in metadata['chapters']]
 
-    if len(missing_markdown) > 0:
-        print(f"Missing markdown files for chapters: {missing_markdown}")
-        return False
-    elif len(missing_markdown) < 0:
-        print(f"Extra markdown files found: {markdown_set - metadata_set}")
+    # Sizes are compared first, sorted names only when they match
+    if len(metadata_names) != len(markdown_mtimes) or sorted(metadata_names) != sorted(markdown_mtimes):
+        metadata_set = set(metadata_names)
+        markdown_set = set(markdown_mtimes)
+        missing_markdown = metadata_set - markdown_set
+        extra_markdown = markdown_set - metadata_set
+        if missing_markdown:
+            print(f"Missing markdown files for chapters: {missing_markdown}")
+        if extra_markdown:
+            print(f"Extra markdown files found: {extra_markdown}")
         return False
 
     return True
@@ -45,14 +47,11 @@ def compare_meta_and_wiki(metadata_file: str, wiki_file: str) -> tuple[bool, Que
     """
     Compare metadata file and wiki file.
         :param metadata_file: Path to the metadata YAML file.
-        :param wiki_file: Path to the wiki YAML file.
+        :param wiki_file: Path to the wiki JSON file.
         :return: Tuple containing a boolean indicating if the metadata matches the wiki, and a Queue with missing chapters if any.
     """
-    with open(metadata_file, 'r', encoding='utf-8') as meta_file:
-        metadata = yaml.safe_load(meta_file)
-
-    with open(wiki_file, 'r', encoding='utf-8') as wiki_f:
-        wiki_data = yaml.safe_load(wiki_f)
+    metadata = _yaml.load_file(metadata_file)
+    wiki_data = _yaml.load_file(wiki_file)
 
     if metadata['wiki_uri'] != wiki_data['wiki_uri']:
         print(f"Wiki URI mismatch: {metadata['wiki_uri']} != {wiki_data['wiki_uri']}")
@@ -61,9 +60,9 @@ def compare_meta_and_wiki(metadata_file: str, wiki_file: str) -> tuple[bool, Que
         print(f"Wiki section mismatch: {metadata['wiki_section']} != {wiki_data['wiki_section']}")
         return False, Queue()
     
-    metadata_chapters = {chapter['url']: chapter for chapter in metadata['chapters']}
-    wiki_chapters = {chapter['url']: chapter for chapter in wiki_data['chapters']}
-    missing_chapters = set(wiki_chapters.keys()) - set(metadata_chapters.keys())
+    metadata_urls = {chapter['url'] for chapter in metadata['chapters']}
+    wiki_urls = {url for url, _ in wiki_data['chapters']}
+    missing_chapters = wiki_urls - metadata_urls
 
     if missing_chapters:
         print(f"Missing chapters in metadata: {missing_chapters}")
@@ -3,97 +3,113 @@ import os
 import re
 from datetime import datetime
 
+_PREV_CHAPTER_RE = re.compile(r'\[\\\[Chapter 1\\\]\].+')
+_NEXT_CHAPTER_RE = re.compile(r'\[[\\\[]?Next Cha[op]ter[\\\]+]?\].*')
+_DELIMITER_RE = re.compile(r'^[-\\]+$')
+_TITLE_PADDING_RE = re.compile(r'&#x200B;')
+# "Chapter XX – Some title", matched against the stripped line with dashes normalized
+_TITLE_RE = re.compile(r'(?:# |\**)?Chapter ([\d/ AB]+) +– +(.+)')
+# A bare "Chapter XX", matched against the line as it is, so indented mentions in the text are not titles
+_BARE_TITLE_RE = re.compile(r'(?:# )?Chapter ([\d/]+)')
+_FALLBACK_TITLE_RE = re.compile(r'\[.+\[(.+)\].?\]')
+_FALLBACK_PART_RE = re.compile(r'#* *\**Part [AB]\**')
+
+# Number of lines at the top of a chapter searched for the previous chapter link
+_LINK_HEADER_LINES = 10
+# Number of lines at the top of a chapter searched first for the chapter title
+_TITLE_SEARCH_LINES = 64
+
 class AJ4ADProcessor(BaseProcessor):
     """
     Processor for the AJ4AD (A Job for a Deathwolder) series from HFY subreddit.
     This processor handles the processing of chapters.
     """
 
-    def process_chapter(self, chapter_path: str) -> None:
+    def process_chapter(self, chapter_path: str, raw_chapter: dict) -> None:
         with open(chapter_path, 'r', encoding='utf-8') as file:
             chapter_text = file.readlines()
         
-        self.remove_redundant_links(chapter_text)
-        self.replace_delimiter(chapter_text)
-        self.remove_title_padding(chapter_text)
+        chapter_text, title_pos = self.transform_lines(chapter_text)
 
         # Chapter one fix
         if 'Chapter one' in chapter_path:
             title_pos = chapter_text.index('**A job for a Deathworlder**\n')
             chapter_text[title_pos] = '# Chapter 1 – A Job for a Deathworlder'
+        elif title_pos is not None:
+            chapter_text[title_pos] = self.format_chapter_title(chapter_text[title_pos])
         else:
-            title_pos = self.find_chapter_title(chapter_text, chapter_path)
+            title_pos = self.find_fallback_title(chapter_text, chapter_path)
         if title_pos is None:
             print(f"[Processor] Warning: No title found in chapter {chapter_path}. Skipping processing.")
             return
 
         self.format_author_notes(chapter_text, title_pos)
-        title = chapter_text[title_pos].strip()
-        del chapter_text[title_pos]  # Remove the title line from the main text
-        chapter_text.insert(0, title + '\n\n')
+        # Put the title and the publishing date on top of the main text
+        output = [chapter_text[title_pos].strip() + '\n\n']
+        if published_date := self.get_published_date(raw_chapter):
+            output.append(f"**Date**: `{published_date}`\n\n")
+        output.extend(chapter_text[:title_pos])
+        output.extend(chapter_text[title_pos + 1:])
 
-        self.add_timestamp(chapter_text, chapter_path)
         output_path = os.path.join(self.processed_dir, os.path.basename(chapter_path))
         with open(output_path, 'w', encoding='utf-8') as file:
-            file.writelines(chapter_text)
+            file.write(''.join(output))
 
-    def remove_redundant_links(self, chapter_text: list[str]) -> None:
+    def transform_lines(self, chapter_text: list[str]) -> tuple[list[str], int|None]:
         """
-        Remove redundant links from the chapter text.
+        Remove redundant links and title padding, replace the delimiters and locate the chapter title in a single pass.
+
+        :return: Transformed lines and the position of the first line that looks like a chapter title, if any.
         """
-        previous_chapter_pattern = re.compile(r'\[\\\[Chapter 1\\\]\].+')
-        next_chapter_pattern = re.compile(r'\[[\\\[]?Next Cha[op]ter[\\\]+]?\].*')
+        # Remove the previous chapter link, it is always near the top
+        start = 1 # For most cases
+        for i in range(min(_LINK_HEADER_LINES, len(chapter_text))): # For oddball cases
+            if _PREV_CHAPTER_RE.match(chapter_text[i]):
+                start = i + 1
 
-        # Remove the previous chapter link
-        chapter_text[0] = '\n' # For most cases
-        for i, line in enumerate(chapter_text): # For oddball cases
-            if previous_chapter_pattern.match(line):
-                chapter_text[i] = '\n'
-                del chapter_text[:i]
+        result = ['\n']
+        title_pos = None
+        for line in chapter_text[start:]:
+            if _NEXT_CHAPTER_RE.search(line):
+                line = '\n'
+            elif _DELIMITER_RE.match(line):
+                line = '-----\n'
+            elif _TITLE_PADDING_RE.match(line):
+                # Drop the padding line together with the line before it, if there is one left
+                if result:
+                    result.pop()
+                    if title_pos == len(result):
+                        title_pos = None
+                continue
 
-        for i, line in enumerate(chapter_text):
-            if next_chapter_pattern.search(line):
-                chapter_text[i] = '\n'
-    
-    def replace_delimiter(self, chapter_text: list[str]) -> None:
-        """
-        Replace the delimiter in the chapter text.
-        """
-        pattern = re.compile(r'^[-\\]+$')
-        for i, line in enumerate(chapter_text):
-            if pattern.match(line):
-                chapter_text[i] = '-----\n'
-    
-    def remove_title_padding(self, chapter_text: list[str]) -> None:
+            if title_pos is None and len(result) < _TITLE_SEARCH_LINES and is_title_line(line):
+                title_pos = len(result)
+            result.append(line)
+
+        # The title is almost always in the head, only scan the remaining lines when it is not
+        if title_pos is None:
+            title_pos = next((i for i in range(_TITLE_SEARCH_LINES, len(result)) if is_title_line(result[i])), None)
+        return result, title_pos
+
+    def format_chapter_title(self, line: str) -> str:
         """
-        Remove the padding around the title.
+        Format a line matched as the chapter title into a heading.
         """
-        pattern = re.compile(r'&#x200B;')
-        i = 0
-        while i < len(chapter_text):
-            if pattern.match(chapter_text[i]):
-                del chapter_text[i-1:i+1] 
-                continue
-            i += 1
+        if match := _TITLE_RE.match(line.strip().replace('-', '–')):
+            title = f"# Chapter {match.group(1)} – {match.group(2)}"
+            return title.replace('*', '').replace('**', '')
+        match = _BARE_TITLE_RE.match(line)
+        return f"# Chapter {match.group(1)}"
 
-    def find_chapter_title(self, chapter_text: list[str], chapter_path: str) -> int|None:
+    def find_fallback_title(self, chapter_text: list[str], chapter_path: str) -> int|None:
         """
-        Find the chapter title in the chapter text.
+        Find a fallback chapter title for chapters without a regular title line.
         """
-        pattern_w_title = re.compile(r'(?:# |\**)?Chapter ([\d/ AB]+) +– +(.+)')
-        pattern_wo_title = re.compile(r'(?:# )?Chapter ([\d/]+)')
-        fallback_pattern = re.compile(r'\[.+\[(.+)\].?\]')
-        fallback_part_pattern = re.compile(r'#* *\**Part [AB]\**')
+        # Padding removal can leave nothing to put the title on
+        if not chapter_text:
+            return None
+
         fallback_pos = 0
-        for i, line in enumerate(chapter_text):
-            if match := pattern_w_title.match(line.strip().replace('-', '–')):
-                chapter_text[i] = f"# Chapter {match.group(1)} – {match.group(2)}"
-                chapter_text[i] = chapter_text[i].replace('*', '').replace('**', '')
-                return i
-            elif match := pattern_wo_title.match(line):
-                chapter_text[i] = f"# Chapter {match.group(1)}"
-                return i
-        
         for i, line in enumerate(chapter_text):
             if line.strip().startswith('-----'):
                 fallback_pos = i
@@ -101,11 +117,11 @@ class AJ4ADProcessor(BaseProcessor):
         
         # Check if there is a part title and overwrite the fallback position
         for i, line in enumerate(chapter_text):
-            if fallback_part_pattern.match(line):
+            if _FALLBACK_PART_RE.match(line):
                 fallback_pos = i
                 break
 
-        if match := fallback_pattern.search(chapter_path):
+        if match := _FALLBACK_TITLE_RE.search(chapter_path):
             chapter_text[fallback_pos] = f"# {match.group(1)}"
             print(f'[Processor] Found fallback title "{chapter_text[fallback_pos]}" at line {fallback_pos} in {chapter_path}')
             return fallback_pos
@@ -122,11 +138,15 @@ class AJ4ADProcessor(BaseProcessor):
             chapter_text[i] = '> ' + chapter_text[i]
 
 
-    def add_timestamp(self, chapter_text: list[str], chapter_path: str) -> None:
+    def get_published_date(self, raw_chapter: dict | None) -> str | None:
         """
-        Add a timestamp to the chapter text.
+        Get the formatted publishing date of the chapter from its raw metadata entry.
         """
-        published_date = [chapter['revision_date'] for chapter in self.raw_metadata['chapters'] if chapter['filename'] == os.path.basename(chapter_path)]
-        if published_date:
-            published_date = datetime.fromtimestamp(published_date[0]).strftime('%Y-%m-%d %A')
-            chapter_text.insert(1, f"**Date**: `{published_date}`\n\n")
\ No newline at end of file
+        if raw_chapter:
+            return datetime.fromtimestamp(raw_chapter['revision_date']).strftime('%Y-%m-%d %A')
+
+def is_title_line(line: str) -> bool:
+    """
+    Check if a line looks like a chapter title.
+    """
+    return _TITLE_RE.match(line.strip().replace('-', '–')) is not None or _BARE_TITLE_RE.match(line) is not None
@@ -1,8 +1,29 @@
 import os
 from glob import glob
 from queue import Queue
-import yaml
-import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from hfy2epub import _yaml
+from hfy2epub import _fs
+
+# Processor instance of the current worker process, created once by _init_worker
+_worker_processor: 'BaseProcessor | None' = None
+
+def _init_worker(processor_class: type['BaseProcessor'], raw_dir: str, processed_dir: str) -> None:
+    """
+    Create the processor used by every task of a worker process.
+    Only the class and the directories are sent to the worker, not the processor state.
+    """
+    global _worker_processor
+    _worker_processor = processor_class(raw_dir, processed_dir)
+
+def _process_chapter(task: tuple[str, dict]) -> None:
+    """
+    Process one chapter in a worker process.
+
+    :param task: Path of the raw chapter file and its raw metadata entry.
+    """
+    chapter_path, raw_chapter = task
+    _worker_processor.process_chapter(chapter_path, raw_chapter)
 
 class BaseProcessor:
     """
@@ -14,6 +35,7 @@ class BaseProcessor:
         self.processed_dir = processed_dir
         self.metadata = {}
         self.raw_metadata = {}
+        self._raw_by_filename: dict[str, dict] = {}
         self.processing_queue = Queue()
     
     def validate_metadata(self) -> bool:
@@ -25,14 +47,13 @@ class BaseProcessor:
         # Raise an error since this cannot be handled from this class
         if not os.path.exists(raw_metadata_file):
             raise FileNotFoundError(f"Raw metadata file not found: {raw_metadata_file}")
-        with open(raw_metadata_file, 'r', encoding='utf-8') as file:
-            self.raw_metadata = yaml.safe_load(file)
+        self.raw_metadata = _yaml.load_file(raw_metadata_file)
+        self._raw_by_filename = {chapter['filename']: chapter for chapter in self.raw_metadata.get('chapters', [])}
 
         if not os.path.exists(metadata_file):
             print(f"[Processor] Metadata file not found: {metadata_file}")
             return False
-        with open(metadata_file, 'r', encoding='utf-8') as file:
-            self.metadata = yaml.safe_load(file)       
+        self.metadata = _yaml.load_file(metadata_file, mutable=True)
 
         if not self.metadata or not self.raw_metadata:
             print("[Processor] Metadata is empty or not properly loaded.")
@@ -44,16 +65,16 @@ class BaseProcessor:
             print("[Processor] Metadata mismatch between processed and raw metadata.")
             return False
         
-        markdown_files = glob(os.path.join(self.processed_dir, '*.md'))
-        if not markdown_files:
+        markdown_names: list[str] = _fs.file_names(self.processed_dir, '.md')
+        if not markdown_names:
             print("[Processor] No markdown files found in the processed directory.")
             return False
         
-        markdown_set: set[str] = set(os.path.basename(f) for f in markdown_files)
-        metadata_set: set[str] = set(chapter['filename'] for chapter in self.metadata.get('chapters', []))
-        if markdown_set != metadata_set:
+        metadata_names: list[str] = [chapter['filename'] for chapter in self.metadata.get('chapters', [])]
+        # Sizes are compared first, sorted names only when they match
+        if len(markdown_names) != len(metadata_names) or sorted(markdown_names) != sorted(metadata_names):
             print()
-            print("[Processor] Mismatch between markdown files and metadata chapters.")
+            print(f"[Processor] Mismatch between markdown files and metadata chapters: {set(markdown_names) ^ set(metadata_names)}")
             return False
         
         return True
@@ -92,40 +113,39 @@ class BaseProcessor:
         Fetch new chapters from the raw directory, delete outdated chapters and enqueue them for processing.
         """
 
-        chapters_df = pd.DataFrame(self.metadata.get('chapters', []))
-        raw_chapters_df = pd.DataFrame(self.raw_metadata.get('chapters', []))
-
-        merged_df = pd.merge(
-            chapters_df, raw_chapters_df, on='url', how='right', suffixes=('_processed', '_raw')
-        )
+        processed_chapters = {chapter['url']: chapter for chapter in self.metadata.get('chapters', [])}
 
-        for _, row in merged_df.iterrows():
-            if pd.isna(row['revision_date_processed']):
-                self.processing_queue.put(os.path.join(self.raw_dir, row['filename_raw']))
-                print(f"[Processor] Enqueued new chapter for processing: {row['filename_raw']}")
-            elif row['revision_date_raw'] > row['revision_date_processed']:
-                self.processing_queue.put(os.path.join(self.raw_dir, row['filename_raw']))
-                print(f"[Processor] Enqueued updated chapter for processing: {row['filename_raw']}")
+        for raw_chapter in self.raw_metadata.get('chapters', []):
+            processed_chapter = processed_chapters.get(raw_chapter['url'])
+            if processed_chapter is None:
+                self.processing_queue.put(os.path.join(self.raw_dir, raw_chapter['filename']))
+                print(f"[Processor] Enqueued new chapter for processing: {raw_chapter['filename']}")
+            elif raw_chapter['revision_date'] > processed_chapter['revision_date']:
+                self.processing_queue.put(os.path.join(self.raw_dir, raw_chapter['filename']))
+                print(f"[Processor] Enqueued updated chapter for processing: {raw_chapter['filename']}")
                 
                 # Delete outdated chapter from processed directory and metadata
-                outdated_file = os.path.join(self.processed_dir, row['filename_processed'])
+                outdated_file = os.path.join(self.processed_dir, processed_chapter['filename'])
                 os.remove(outdated_file)
                 print(f"[Processor] Deleted outdated chapter: {outdated_file}")
-                chapters_df = chapters_df[chapters_df['filename'] != row['filename_processed']]
+                del processed_chapters[raw_chapter['url']]
         
-        self.metadata['chapters'] = chapters_df.to_dict(orient='records')
+        self.metadata['chapters'] = list(processed_chapters.values())
 
         if self.processing_queue.empty():
             print("[Processor] No new or updated chapters found to process.")
         else:
             print(f"[Processor] Processing queue updated with {self.processing_queue.qsize()} chapters.")
-            with open(os.path.join(self.processed_dir, 'metadata.yaml'), 'w', encoding='utf-8') as file:
-                yaml.safe_dump(self.metadata, file, allow_unicode=True)
+            _yaml.dump_file(self.metadata, os.path.join(self.processed_dir, 'metadata.yaml'))
             print("[Processor] Metadata removed outdated chapters.")
 
-    def process_chapter(self, chapter_path: str) -> None:
+    def process_chapter(self, chapter_path: str, raw_chapter: dict) -> None:
         """
         Process a single chapter file. This method should be overridden by subclasses.
+        It runs in a worker process, so it should only rely on its arguments and the directories.
+
+        :param chapter_path: Path of the raw chapter file.
+        :param raw_chapter: Raw metadata entry of the chapter.
         """
         raise NotImplementedError("Subclasses must implement this method.")
     
@@ -141,23 +161,26 @@ class BaseProcessor:
             self.wipe()
             self.fetch_all()
 
-        raw_meta_df = pd.DataFrame(self.raw_metadata.get('chapters', []))
-
+        chapter_paths: list[str] = []
         while not self.processing_queue.empty():
-            chapter_path = self.processing_queue.get()
-            print(f"[Processor] Processing chapter: {chapter_path}")
-            self.process_chapter(chapter_path)
+            chapter_paths.append(self.processing_queue.get())
             self.processing_queue.task_done()
 
-            self.metadata['chapters'].append({
-                'filename': os.path.basename(chapter_path),
-                'url': raw_meta_df[raw_meta_df['filename'] == os.path.basename(chapter_path)]['url'].values[0],
-                'revision_date': int(raw_meta_df[raw_meta_df['filename'] == os.path.basename(chapter_path)]['revision_date'].values[0])
-            })
+        # Chapters are independent of each other, so they are processed in parallel.
+        # Each task only carries its own chapter path and raw metadata entry.
+        tasks = [(chapter_path, self._raw_by_filename[os.path.basename(chapter_path)]) for chapter_path in chapter_paths]
+        with ProcessPoolExecutor(initializer=_init_worker, initargs=(type(self), self.raw_dir, self.processed_dir)) as executor:
+            for (chapter_path, raw_chapter), _ in zip(tasks, executor.map(_process_chapter, tasks, chunksize=8)):
+                print(f"[Processor] Processed chapter: {chapter_path}")
+
+                self.metadata['chapters'].append({
+                    'filename': os.path.basename(chapter_path),
+                    'url': raw_chapter['url'],
+                    'revision_date': int(raw_chapter['revision_date'])
+                })
         
         print("[Processor] All chapters processed.")
 
-        with open(os.path.join(self.processed_dir, 'metadata.yaml'), 'w', encoding='utf-8') as file:
-            yaml.safe_dump(self.metadata, file, allow_unicode=True)
-            print("[Processor] Metadata updated after processing chapters.")
+        _yaml.dump_file(self.metadata, os.path.join(self.processed_dir, 'metadata.yaml'))
+        print("[Processor] Metadata updated after processing chapters.")
 
@@ -1,5 +1,6 @@
 import praw
 import os
+from hfy2epub import _fs
 from hfy2epub.Project.project_config import ProjectConfig
 from hfy2epub.Project.wiki_processor import WikiProcessor
 from hfy2epub.Downloader.downloader import Downloader
@@ -11,10 +12,7 @@ class Project:
 
 
         # Initialize Reddit client
-        self.reddit = praw.Reddit(
-            config.reddit_bot,
-            config_interpolation='basic'
-        )
+        self.reddit = self.make_reddit()
 
         # Ensure project directory exists
         self.project_dir = os.path.join(os.getcwd(), 'projects', config.project_name)
@@ -22,13 +20,23 @@ class Project:
         self.raw_dir = os.path.join(self.project_dir, 'raw')
         self.processed_dir = os.path.join(self.project_dir, 'processed')
 
+        # Only the project directory may need its parents created, the rest are its direct children
         os.makedirs(self.project_dir, exist_ok=True)
-        os.makedirs(self.wiki_dir, exist_ok=True)
-        os.makedirs(self.raw_dir, exist_ok=True)
-        os.makedirs(self.processed_dir, exist_ok=True)
+        for directory in (self.wiki_dir, self.raw_dir, self.processed_dir):
+            _fs.ensure_dir(directory)
 
 
 
+    def make_reddit(self) -> praw.Reddit:
+        """
+        Create a Reddit client for the configured bot.
+        PRAW clients are not thread-safe, so the downloader creates one per thread with this method.
+        """
+        return praw.Reddit(
+            self.config.reddit_bot,
+            config_interpolation='basic'
+        )
+
     def run(self):
         """
         Main method to run the project.
@@ -45,7 +53,7 @@ class Project:
 
         print(f"[Project] Wiki data for subreddit '{self.config.subreddit_name}' has been fetched and written to {self.wiki_dir}.")
         
-        downloader = Downloader(self.reddit, self.raw_dir, self.wiki_dir)
+        downloader = Downloader(self.make_reddit, self.raw_dir, self.wiki_dir)
         downloader.run()
 
         # TODO: Implement more modular logic
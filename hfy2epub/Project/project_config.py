@@ -1,3 +1,5 @@
+from urllib.parse import urlsplit
+
 class ProjectConfig:
     def __init__(self, reddit_bot: str, wiki_url: str, wiki_section: str, project_name: str):
         """
@@ -10,13 +12,14 @@ class ProjectConfig:
         self.project_name = project_name
         self.wiki_section = wiki_section
 
-        uri = wiki_url.split('https://www.reddit.com/r/')[1].strip('/').split('/')
+        # Path is '/r/{subreddit_name}/wiki/{wiki_uri}', whatever the scheme or host
+        uri = urlsplit(wiki_url).path.strip('/').split('/')
         
-        if len(uri) < 3:
+        if len(uri) < 4 or uri[0] != 'r' or uri[2] != 'wiki':
             raise ValueError("Invalid wiki URL format. Expected format: https://www.reddit.com/r/{subreddit_name}/wiki/{wiki_uri}")
         
-        self.subreddit_name = uri[0]
-        self.wiki_uri = '/'.join(uri[2:])
+        self.subreddit_name = uri[1]
+        self.wiki_uri = '/'.join(uri[3:])
 
     def __repr__(self):
         return f"ProjectConfig(reddit_bot={self.reddit_bot}, project_name='{self.project_name}')"
\ No newline at end of file
@@ -1,16 +1,22 @@
 from datetime import datetime
-from praw.models import Subreddit, WikiPage
+from praw.models import Redditor, Subreddit, WikiPage
 import mistune
-import re
-import yaml
+import orjson
 import os
-from datetime import datetime
+
+# Only the token tree is needed to find the links, so no HTML is rendered.
+# Building the parser is expensive, so a single one is shared by all pages.
+_markdown = mistune.create_markdown(renderer='ast')
+# Characters unsupported by most file systems, replaced with '_' in chapter titles
+_FS_TRANS = str.maketrans({char: '_' for char in '<>:"/\\|?*'})
 
 class WikiProcessor:
     def __init__(self, subreddit: Subreddit, wiki_uri: str, wiki_section: str):
         self.subreddit = subreddit
         self.wiki_section = wiki_section
         self.wiki_uri = wiki_uri
+        # casefold() also matches titles that only differ in Unicode case forms, like 'ß' and 'SS'
+        self._section_key = wiki_section.strip().casefold()
 
 
     def fetch_wiki_data(self) -> dict:
@@ -30,15 +36,16 @@ class WikiProcessor:
         if not chapters:
             raise ValueError(f"No chapters found in the wiki section '{self.wiki_section}' of subreddit '{self.subreddit.display_name}'.")
         
-        revision_date = datetime.fromtimestamp(wiki_page.revision_date).strftime('%Y-%m-%d')
+        revision_date = datetime.fromtimestamp(wiki_page.revision_date).date().isoformat()
 
         self.wiki_data = {
             'subreddit': self.subreddit.display_name,
             'wiki_uri': self.wiki_uri,
             'wiki_section': self.wiki_section,
             'revision_date': revision_date,
-            'author': wiki_page.revision_by.name if wiki_page.revision_by else 'Unknown',
-            'chapters': [{'url': url, 'title': title} for url, title in chapters]
+            'author': author_name(wiki_page.revision_by),
+            # [url, title] pairs are stored as they are, a dict per chapter would only repeat the keys
+            'chapters': chapters
         }
 
         return self.wiki_data
@@ -50,50 +57,69 @@ class WikiProcessor:
         Returns:
             A list of tuples (url, title).
         """
-        renderer = SectionLinkRenderer(self.wiki_section)
-        markdown = mistune.create_markdown(renderer=renderer)
-        fixed_content = re.sub(r'(^|\s)(#+)(?=[^\s#])', r'\1\2 ', wiki_page.content_md)
-        markdown(fixed_content)
+        tokens = _markdown(fix_headings(wiki_page.content_md))
+
+        links: list[tuple[str, str]] = []
+        in_section = False
+
+        def walk(tokens: list[dict]) -> None:
+            nonlocal in_section
+            # Tokens are visited in document order, so a heading switches the section for every link after it
+            for token in tokens:
+                if token['type'] == 'link':
+                    if in_section:
+                        links.append((token['attrs']['url'], token_text(token).translate(_FS_TRANS)))
+                elif 'children' in token:
+                    # Links inside a heading still belong to the previous section,
+                    # e.g. the last line of a paragraph turned into a setext heading by a '---' line
+                    walk(token['children'])
+                if token['type'] == 'heading':
+                    in_section = token_text(token).strip().casefold() == self._section_key
 
-        return renderer.links
+        walk(tokens)
+        return links
 
     def write_wiki_data(self, output_dir: str):
         """
-        Write the wiki data to a YAML file.
+        Write the wiki data to a JSON file.
+        It is only read back by the later stages, so it does not need to be human friendly YAML.
         
-        :param output_file: The path to the output YAML file.
+        :param output_dir: The directory to write the JSON file to.
         """
         if not hasattr(self, 'wiki_data'):
             raise ValueError("Wiki data has not been fetched. Call fetch_wiki_data() first.")
         
-        output_file = os.path.join(output_dir, f"wiki_{self.subreddit.display_name}_[{self.wiki_section}]_{self.wiki_data['revision_date']}.yaml")
+        output_file = os.path.join(output_dir, f"wiki_{self.subreddit.display_name}_[{self.wiki_section}]_{self.wiki_data['revision_date']}.json")
 
-        with open(output_file, 'w', encoding='utf-8') as file:
-            yaml.dump(self.wiki_data, file, allow_unicode=True, default_flow_style=False)
+        with open(output_file, 'wb') as file:
+            file.write(orjson.dumps(self.wiki_data, option=orjson.OPT_INDENT_2))
         
-class SectionLinkRenderer(mistune.HTMLRenderer):
-    def __init__(self, section_title):
-        super().__init__()
-        self.links = []
-        self.in_section = False
-        self.section_title = section_title
+def fix_headings(markdown: str) -> str:
+    """
+    Add the missing space after the '#' markers of headings, which markdown requires but wiki authors often skip.
+    Only lines starting with '#' are touched.
+    """
+    lines = markdown.split('\n')
+    for i, line in enumerate(lines):
+        if line.startswith('#'):
+            level = len(line) - len(line.lstrip('#'))
+            if level < len(line) and not line[level].isspace():
+                lines[i] = line[:level] + ' ' + line[level:]
+    return '\n'.join(lines)
 
-    def strong(self, text):
-        return text
-    
-    def emphasis(self, text):
-        return text
+def token_text(token: dict) -> str:
+    """
+    Get the plain text of a markdown AST token, dropping any inline formatting.
+    """
+    if 'children' in token:
+        return ''.join(token_text(child) for child in token['children'])
+    return token.get('raw', '')
 
-    def heading(self, text, level, **attrs):
-        if text.strip().lower() == self.section_title.strip().lower():
-            self.in_section = True
-        else:
-            self.in_section = False
-        return f'<h{level}>{text}</h{level}>'
-    
-    def link(self, text, url, title=None):
-        if self.in_section:
-            # Replace all characters unsupported by most file systems with '_'
-            text = re.sub(r'[<>:"\/\\|?*]', '_', text)
-            self.links.append((url, text))
-        return super().link(url, text, title)
\ No newline at end of file
+def author_name(redditor: Redditor | None) -> str:
+    """
+    Get the name of a redditor without fetching their profile.
+    PRAW sets the name when it builds the Redditor, only other attributes trigger an /about/ request.
+    """
+    if redditor is None:
+        return 'Unknown'
+    return redditor.name
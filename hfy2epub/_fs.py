@@ -0,0 +1,59 @@
+import os
+
+# Directories known to exist, so repeated calls in the same process skip the syscalls
+_existing_dirs: set[str] = set()
+
+def latest_file(dirpath: str, suffix: str = '.json') -> str | None:
+    """
+    Find the most recently modified file with the given suffix in a directory.
+    The directory is listed once with os.scandir, which caches each entry's stat result.
+
+    :param dirpath: Directory to search.
+    :param suffix: File name suffix to match, the JSON wiki index files by default.
+    :return: Path to the latest file, or None if there is no matching file.
+    """
+    latest_entry = None
+    with os.scandir(dirpath) as entries:
+        for entry in entries:
+            if not entry.name.endswith(suffix):
+                continue
+            if latest_entry is None or entry.stat().st_mtime_ns > latest_entry.stat().st_mtime_ns:
+                latest_entry = entry
+    return latest_entry.path if latest_entry else None
+
+def file_names(dirpath: str, suffix: str) -> list[str]:
+    """
+    Get the names of all files with the given suffix in a directory.
+
+    :param dirpath: Directory to list.
+    :param suffix: File name suffix to match.
+    :return: List of file names without the directory part, in arbitrary order.
+    """
+    with os.scandir(dirpath) as entries:
+        return [entry.name for entry in entries if entry.name.endswith(suffix)]
+
+def file_mtimes(dirpath: str, suffix: str) -> dict[str, int]:
+    """
+    Get the modification times of all files with the given suffix in a directory.
+
+    :param dirpath: Directory to list.
+    :param suffix: File name suffix to match.
+    :return: Dictionary mapping file names to their modification time in nanoseconds.
+    """
+    with os.scandir(dirpath) as entries:
+        return {entry.name: entry.stat().st_mtime_ns for entry in entries if entry.name.endswith(suffix)}
+
+def ensure_dir(path: str) -> None:
+    """
+    Create a directory whose parent already exists, doing nothing if it is already there.
+    Unlike os.makedirs with exist_ok, the parents are never checked.
+
+    :param path: Directory to create.
+    """
+    if path in _existing_dirs:
+        return
+    try:
+        os.mkdir(path)
+    except FileExistsError:
+        pass
+    _existing_dirs.add(path)
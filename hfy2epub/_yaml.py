@@ -0,0 +1,101 @@
+import os
+import copy
+import tempfile
+from functools import lru_cache
+import orjson
+import yaml
+
+# Prefer the LibYAML bindings when PyYAML was built with them
+Loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+Dumper = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+
+def load(stream):
+    """
+    Load a YAML document using the fastest available safe loader.
+
+    :param stream: Open file or string containing the YAML document.
+    :return: Parsed YAML data.
+    """
+    return yaml.load(stream, Loader=Loader)
+
+def dump(obj, stream=None, **kwargs):
+    """
+    Dump an object to YAML using the fastest available safe dumper.
+
+    :param obj: Object to serialize.
+    :param stream: Open file to write to. If None, the YAML is returned as a string.
+    :return: YAML string if no stream was given, None otherwise.
+    """
+    kwargs.setdefault('allow_unicode', True)
+    return yaml.dump(obj, stream, Dumper=Dumper, **kwargs)
+
+@lru_cache(maxsize=32)
+def _load_file(path: str, mtime_ns: int, size: int):
+    # JSON is valid YAML, but orjson parses it far faster than any YAML loader
+    if path.endswith('.json'):
+        with open(path, 'rb') as file:
+            return orjson.loads(file.read())
+
+    # A JSON sidecar written after the YAML holds the same data and is much faster to parse
+    sidecar = path + '.json'
+    try:
+        if os.stat(sidecar).st_mtime_ns >= mtime_ns:
+            with open(sidecar, 'rb') as file:
+                return orjson.loads(file.read())
+    except (OSError, ValueError):
+        pass
+
+    with open(path, 'r', encoding='utf-8') as file:
+        data = load(file)
+    _write_sidecar(sidecar, data)
+    return data
+
+def _write_sidecar(sidecar: str, data) -> None:
+    """
+    Atomically write the JSON sidecar for a YAML file.
+    Data that cannot be represented in JSON is silently left without a sidecar.
+    Dates are passed through so they fail as well, instead of coming back as strings.
+    """
+    try:
+        content = orjson.dumps(data, option=orjson.OPT_PASSTHROUGH_DATETIME)
+    except TypeError:
+        return
+
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(sidecar), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            file.write(content)
+        os.replace(temp_path, sidecar)
+    except OSError:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+def load_file(path: str, mutable: bool = False):
+    """
+    Load a YAML or JSON file, reusing the parsed data while the file is unchanged.
+    Files are keyed by their absolute path, modification time and size.
+    For YAML files a '<path>.json' sidecar is kept next to the file and preferred while it is up to date.
+
+    :param path: Path to the YAML or JSON file.
+    :param mutable: Return a private copy that the caller is free to modify.
+    :return: Parsed data. Shared between callers unless mutable is set.
+    """
+    stat = os.stat(path)
+    data = _load_file(os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+    return copy.deepcopy(data) if mutable else data
+
+def dump_file(obj, path: str, **kwargs) -> None:
+    """
+    Dump an object to a YAML file and invalidate the cached data.
+
+    :param obj: Object to serialize.
+    :param path: Path to the YAML file.
+    """
+    # The emitter issues many small writes, a larger buffer batches them into fewer syscalls
+    with open(path, 'w', encoding='utf-8', buffering=1 << 16) as file:
+        dump(obj, file, **kwargs)
+
+    # The sidecar may share the new file's mtime on coarse filesystems, so drop it explicitly
+    if os.path.exists(path + '.json'):
+        os.remove(path + '.json')
+    _load_file.cache_clear()
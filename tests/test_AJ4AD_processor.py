@@ -0,0 +1,43 @@
+import unittest
+from hfy2epub.Processor.AJ4AD_processor import AJ4ADProcessor
+
+class TransformLinesTest(unittest.TestCase):
+    def setUp(self):
+        self.processor = AJ4ADProcessor('raw', 'processed')
+
+    def test_double_title_padding_after_header(self):
+        lines = ['links\n', '&#x200B;\n', '&#x200B;\n', '\n', '# Chapter 7 – Seven\n', '\n', 'Body\n']
+
+        result, title_pos = self.processor.transform_lines(lines)
+
+        self.assertEqual(result, ['\n', '# Chapter 7 – Seven\n', '\n', 'Body\n'])
+        self.assertEqual(title_pos, 1)
+
+    def test_padding_only_chapter(self):
+        lines = ['\n', '&#x200B;\n', '&#x200B;\n']
+
+        result, title_pos = self.processor.transform_lines(lines)
+
+        self.assertEqual(result, [])
+        self.assertIsNone(title_pos)
+        self.assertIsNone(self.processor.find_fallback_title(result, '1700000000 - a - [Chapter [2]].md'))
+
+    def test_title_after_long_link_header(self):
+        lines = ['links\n'] + ['[Link](url)\n'] * 80 + ['\n', '# Chapter 8 – Eight\n', '\n', 'Body\n']
+
+        result, title_pos = self.processor.transform_lines(lines)
+
+        self.assertEqual(result[title_pos], '# Chapter 8 – Eight\n')
+
+    def test_indented_bare_chapter_is_not_a_title(self):
+        lines = ['links\n', '\n', 'Preamble\n', '  Chapter 10\n', 'Body\n']
+
+        _, title_pos = self.processor.transform_lines(lines)
+
+        self.assertIsNone(title_pos)
+
+    def test_bare_chapter_title(self):
+        self.assertEqual(self.processor.format_chapter_title('Chapter 10\n'), '# Chapter 10')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+import unittest
+from types import SimpleNamespace
+from hfy2epub.Project.wiki_processor import WikiProcessor
+
+class ExtractChaptersTest(unittest.TestCase):
+    def extract(self, content_md: str) -> list[tuple[str, str]]:
+        processor = WikiProcessor(None, 'wiki', 'A Job')
+        return processor.extract_chapters(SimpleNamespace(content_md=content_md))
+
+    def test_nested_brackets_and_parentheses(self):
+        chapters = self.extract("## A Job\n[Chapter [1]](https://r/a_(b))\n[Chapter 2](<https://r/2> \"title\")\n")
+
+        self.assertEqual(chapters, [('https://r/a_(b)', 'Chapter [1]'), ('https://r/2', 'Chapter 2')])
+
+    def test_heading_forms(self):
+        for content_md in ("## A Job ##\n[Ch](https://r/1)\n",
+                           "## _A Job_\n[Ch](https://r/1)\n",
+                           "##A Job\n[Ch](https://r/1)\n",
+                           "A Job\n=====\n\n[Ch](https://r/1)\n"):
+            with self.subTest(content_md=content_md):
+                self.assertEqual(self.extract(content_md), [('https://r/1', 'Ch')])
+
+    def test_section_ends_at_next_heading(self):
+        chapters = self.extract("## A Job\n* [Ch](https://r/1)\n---\n\nOther\n-----\n[x](https://r/x)\n")
+
+        self.assertEqual(chapters, [('https://r/1', 'Ch')])
+
+    def test_links_on_setext_heading_line(self):
+        chapters = self.extract("#A Job\n[Chapter 1](u1)  \n[Chapter 2](u2)  \n[Chapter 3](u3)\n---\n")
+
+        self.assertEqual(chapters, [('u1', 'Chapter 1'), ('u2', 'Chapter 2'), ('u3', 'Chapter 3')])
+
+    def test_hash_in_fenced_code_is_not_a_heading(self):
+        chapters = self.extract("## A Job\n* [Ch 1](u1)\n```\n#include <x>\n```\n* [Ch 2](u2)\n")
+
+        self.assertEqual(chapters, [('u1', 'Ch 1'), ('u2', 'Ch 2')])
+
+    def test_reference_links_and_autolinks(self):
+        chapters = self.extract("## A Job\n[Ch][1]\n\n<https://r/2>\n\n[1]: https://r/1\n")
+
+        self.assertEqual(chapters, [('https://r/1', 'Ch'), ('https://r/2', 'https___r_2')])
+
+if __name__ == '__main__':
+    unittest.main()